@@ -4,11 +4,12 @@ Tool to list available LLM models
 
 Usage:
     python list_models.py [provider]
-    
+
 Arguments:
     provider: Provider to list models for (e.g., 'openai' or 'o')
 """
 import argparse
+import asyncio
 import sys
 from typing import List, Optional
 
@@ -27,24 +28,50 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def _list_for_provider(provider: Provider) -> List[str]:
+    """List models for a single provider
+
+    The provider class (and with it the provider SDK) is only imported
+    here, after argument parsing, so invoking the CLI for one provider
+    never pays the import cost of the others.
+    """
+    from src.just_prompt.atoms.llm_providers import get_provider_class
+
+    provider_class = get_provider_class(provider)
+    return asyncio.run(provider_class().list_models())
+
+
 def main() -> int:
     """Main function"""
     args = parse_args()
-    
+
     if args.provider:
         try:
             provider = Provider.from_prefix(args.provider)
-            print(f"Listing models for {provider.value}:")
-            # Logic to get models for the specified provider will be added here
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"Listing models for {provider.value}:")
+        try:
+            for model in _list_for_provider(provider):
+                print(f"  {model}")
         except ValueError as e:
             print(f"Error: {e}", file=sys.stderr)
             return 1
     else:
         print("Listing models for all providers:")
-        # Logic to get models for all providers will be added here
-    
+        for provider in Provider:
+            try:
+                models = _list_for_provider(provider)
+            except ValueError:
+                # Provider not supported or not configured; skip it
+                continue
+            print(f"{provider.value}:")
+            for model in models:
+                print(f"  {model}")
+
     return 0
 
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
@@ -1,3 +1,41 @@
 """
 LLM providers package
-""" 
\ No newline at end of file
+"""
+import importlib
+
+from just_prompt.atoms.shared.data_types import Provider
+
+# Provider classes keyed by the Provider enum. Modules are resolved on
+# first use so selecting one provider never pays the import cost of the
+# other provider SDKs.
+PROVIDER_MAP = {
+    Provider.ANTHROPIC: (".anthropic", "AnthropicProvider"),
+    Provider.OPENAI: (".openai", "OpenAIProvider"),
+    Provider.GEMINI: (".gemini", "GeminiProvider"),
+}
+
+
+def get_provider_class(provider: Provider):
+    """Get the provider class for the given provider, importing its module on demand"""
+    entry = PROVIDER_MAP.get(provider)
+    if entry is None:
+        raise ValueError(f"Provider not supported: {provider.value}")
+    module_name, class_name = entry
+    module = importlib.import_module(module_name, __name__)
+    return getattr(module, class_name)
+
+
+# PEP 562 lazy re-exports: the provider classes can be imported from this
+# package, but each module is only loaded when its class is first accessed.
+_LAZY = {class_name: module_name for module_name, class_name in PROVIDER_MAP.values()}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module_name = _LAZY.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,149 +1,180 @@
 """
 Anthropic provider implementation for Just-Prompt
 """
+import asyncio
 import os
 import re
-import time
 from typing import List, Optional, Dict, Any, Tuple
 
-import anthropic
-from anthropic import Anthropic
-
+from just_prompt.atoms.llm_providers.base import ChatModelBase
+from just_prompt.atoms.shared.cache import ttl_cache
 from just_prompt.atoms.shared.data_types import PromptResponse
 
+# Compiled once at import so hot-path model parsing skips the re module's
+# pattern cache lookup on every call
+_THINKING_RE = re.compile(r"^(.*?):(\d+)([km])?$")
+
+# Multipliers for the optional thinking-tokens unit suffix
+_UNIT_MULTIPLIER = {None: 1, 'k': 1024, 'm': 1024 * 1024}
+
+# How long to wait between polls while a message batch is processing
+_BATCH_POLL_INTERVAL = 1.0
+
+# Anthropic has no model-listing endpoint, so the known models are a static
+# tuple built once at import instead of a fresh list per call
+_STATIC_MODELS = (
+    "claude-3-opus-20240229",
+    "claude-3-sonnet-20240229",
+    "claude-3-haiku-20240307",
+    "claude-3-7-sonnet-20250219",
+    "claude-2.1",
+    "claude-2.0",
+    "claude-instant-1.2",
+)
+
 
-class AnthropicProvider:
+class AnthropicProvider(ChatModelBase):
     """Anthropic provider implementation"""
-    
-    def __init__(self):
-        """Initialize the Anthropic provider with API key"""
+
+    _PROVIDER_NAME = "Anthropic"
+
+    def __init__(self, client=None):
+        """Initialize the Anthropic provider with API key
+
+        An already-built client can be injected (e.g. a stub in tests);
+        otherwise one is constructed from the environment API key.
+        """
+        # Imported here so the SDK is only loaded when this provider is used
+        import anthropic
+        self._anthropic = anthropic
+        self._RATE_LIMIT_EXC = (anthropic.RateLimitError,)
+        self._AUTH_EXC = (anthropic.AuthenticationError,)
+        self._API_ERROR_EXC = (anthropic.APIError,)
+
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-        self.client = Anthropic(api_key=self.api_key)
-    
+        if client is not None:
+            self.client = client
+        else:
+            # The aiohttp transport supports more concurrent in-flight
+            # requests than the default httpx transport when /prompt fans
+            # out widely
+            self.client = anthropic.AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=anthropic.DefaultAioHttpClient()
+            )
+
+    @ttl_cache()
     async def list_models(self) -> List[str]:
         """List available models from Anthropic"""
-        try:
-            # Anthropic API doesn't have a specific endpoint for listing models
-            # We'll return a static list of known models
-            return [
-                "claude-3-opus-20240229",
-                "claude-3-sonnet-20240229",
-                "claude-3-haiku-20240307",
-                "claude-3-7-sonnet-20250219",
-                "claude-2.1",
-                "claude-2.0",
-                "claude-instant-1.2"
-            ]
-        except Exception as e:
-            # Handle any errors that occur during model listing
-            return await self._handle_error(e)
-        
+        # Copied so callers can mutate their list without touching the shared tuple
+        return list(_STATIC_MODELS)
+
     async def generate(self, prompt: str, model: str) -> PromptResponse:
         """Generate a response for the given prompt using the specified model"""
-        try:
-            # Parse model name to extract thinking tokens if specified
+        # Parse model name to extract thinking tokens if specified
+        base_model, thinking_tokens = self._parse_model_with_thinking_tokens(model)
+
+        message_params = {
+            "model": base_model,
+            "max_tokens": 1024,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if thinking_tokens:
+            message_params["thinking_tokens"] = thinking_tokens
+
+        response = await self._retry(self.client.messages.create, **message_params)
+
+        # Calculate token usage if available
+        usage = getattr(response, 'usage', None)
+        tokens = usage.input_tokens + usage.output_tokens if usage else None
+
+        return PromptResponse(
+            model=model,
+            content=response.content[0].text,
+            tokens=tokens
+        )
+
+    async def stream_generate(self, prompt: str, model: str):
+        """Stream the response for the given prompt as text chunks"""
+        # Parse model name to extract thinking tokens if specified
+        base_model, thinking_tokens = self._parse_model_with_thinking_tokens(model)
+
+        message_params = {
+            "model": base_model,
+            "max_tokens": 1024,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if thinking_tokens:
+            message_params["thinking_tokens"] = thinking_tokens
+
+        async with self.client.messages.stream(**message_params) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    async def batch_generate(self, items: List[Tuple[str, str]]) -> List[PromptResponse]:
+        """Generate responses for several (prompt, model) pairs in one batch
+
+        Uses the Message Batches API, which processes a bulk submission at
+        half the cost and often higher effective throughput than issuing
+        the same requests individually.
+        """
+        requests = []
+        for i, (prompt, model) in enumerate(items):
             base_model, thinking_tokens = self._parse_model_with_thinking_tokens(model)
-            
-            # Set up the message request
-            message_params = {
+            params = {
                 "model": base_model,
                 "max_tokens": 1024,
                 "messages": [{"role": "user", "content": prompt}]
             }
-            
-            # Add thinking tokens if specified
             if thinking_tokens:
-                message_params["thinking_tokens"] = thinking_tokens
-                
-            # Call Anthropic API
-            response = self.client.messages.create(**message_params)
-            
-            # Calculate token usage if available
-            tokens = None
-            if hasattr(response, 'usage'):
-                tokens = response.usage.input_tokens + response.usage.output_tokens
-            
-            return PromptResponse(
+                params["thinking_tokens"] = thinking_tokens
+            requests.append({"custom_id": f"r{i}", "params": params})
+
+        batch = await self._retry(self.client.messages.batches.create, requests=requests)
+
+        # Poll until the batch has finished processing
+        while batch.processing_status != "ended":
+            await asyncio.sleep(_BATCH_POLL_INTERVAL)
+            batch = await self._retry(self.client.messages.batches.retrieve, batch.id)
+
+        # Collect results keyed by custom_id; the API does not guarantee
+        # result order matches submission order
+        messages = {}
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                raise ValueError(f"Anthropic batch request {entry.custom_id} {entry.result.type}")
+            messages[entry.custom_id] = entry.result.message
+
+        responses = []
+        for i, (prompt, model) in enumerate(items):
+            message = messages[f"r{i}"]
+            usage = getattr(message, 'usage', None)
+            tokens = usage.input_tokens + usage.output_tokens if usage else None
+            responses.append(PromptResponse(
                 model=model,
-                content=response.content[0].text,
+                content=message.content[0].text,
                 tokens=tokens
-            )
-        except Exception as e:
-            # Handle any errors that occur during generation
-            return await self._handle_error(e, retry_count=0, prompt=prompt, model=model)
-    
+            ))
+        return responses
+
     def _parse_model_with_thinking_tokens(self, model: str) -> Tuple[str, Optional[int]]:
         """Parse model name that might include thinking tokens suffix
-        
+
         Example: "claude-3-7-sonnet-20250219:4k" -> ("claude-3-7-sonnet-20250219", 4096)
         """
+        # Fast path: most model names carry no suffix, so a C-level substring
+        # check avoids the regex engine entirely
+        if ':' not in model:
+            return model, None
+
         # Check if model includes a thinking tokens suffix
-        pattern = r"^(.*?):(\d+)([km])?$"
-        match = re.match(pattern, model)
-        
+        match = _THINKING_RE.match(model)
+
         if not match:
             # No thinking tokens specified
             return model, None
-        
-        base_model = match.group(1)
-        token_value = int(match.group(2))
-        unit = match.group(3)
-        
-        # Convert to actual token value
-        if unit == 'k':
-            token_value *= 1024
-        elif unit == 'm':
-            token_value *= 1024 * 1024
-            
-        return base_model, token_value
-        
-    async def _handle_error(self, error: Exception, retry_count: int = 0, **kwargs) -> Any:
-        """Handle errors with appropriate retry logic"""
-        # Maximum number of retries
-        max_retries = 3
-        
-        # Handle rate limiting errors
-        if isinstance(error, anthropic.RateLimitError) and retry_count < max_retries:
-            # Exponential backoff: wait longer between each retry
-            wait_time = 2 ** retry_count
-            time.sleep(wait_time)
-            
-            # Extract prompt and model from kwargs if they exist
-            prompt = kwargs.get("prompt")
-            model = kwargs.get("model")
-            
-            if prompt and model:
-                # Retry the generate method with incremented retry count
-                retry_count += 1
-                return await self.generate(prompt, model)
-            else:
-                # If we don't have enough information to retry, re-raise the error
-                raise error
-        
-        # Handle authentication errors
-        elif isinstance(error, anthropic.AuthenticationError):
-            raise ValueError(f"Anthropic API key is invalid: {str(error)}")
-        
-        # Handle API errors
-        elif isinstance(error, anthropic.APIError):
-            if retry_count < max_retries:
-                # Wait a bit and retry
-                time.sleep(1)
-                
-                # Extract prompt and model from kwargs if they exist
-                prompt = kwargs.get("prompt")
-                model = kwargs.get("model")
-                
-                if prompt and model:
-                    # Retry the generate method with incremented retry count
-                    retry_count += 1
-                    return await self.generate(prompt, model)
-            
-            # If we've exceeded max retries or don't have enough info, re-raise
-            raise ValueError(f"Anthropic API error: {str(error)}")
-        
-        # Handle other errors
-        else:
-            raise ValueError(f"Error occurred when calling Anthropic API: {str(error)}") 
\ No newline at end of file
+
+        # Convert to actual token value using the unit suffix, if any
+        return match.group(1), int(match.group(2)) * _UNIT_MULTIPLIER[match.group(3)]
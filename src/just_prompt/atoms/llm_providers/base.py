@@ -0,0 +1,62 @@
+"""
+Shared base class for Just-Prompt providers
+"""
+import asyncio
+from typing import Any, Callable, Tuple
+
+# Maximum number of retries for transient errors
+MAX_RETRIES = 3
+
+
+class ChatModelBase:
+    """Base class centralizing retry and error classification
+
+    Subclasses assign the exception tuples (typically in __init__, once
+    their SDK is imported) or override the classifier hooks for SDKs that
+    do not expose structured exceptions, then wrap their SDK calls with
+    _retry instead of carrying their own backoff logic.
+    """
+
+    # Human-readable provider name used in error messages
+    _PROVIDER_NAME = "LLM"
+
+    # Exception types that warrant exponential backoff and retry
+    _RATE_LIMIT_EXC: Tuple = ()
+    # Exception types that mean the API key is bad; never retried
+    _AUTH_EXC: Tuple = ()
+    # Exception types for transient API failures; retried after a short wait
+    _API_ERROR_EXC: Tuple = ()
+
+    def _is_rate_limit_error(self, error: Exception) -> bool:
+        """Whether the error is a rate limit that deserves backoff"""
+        return isinstance(error, self._RATE_LIMIT_EXC)
+
+    def _is_auth_error(self, error: Exception) -> bool:
+        """Whether the error means the API key is invalid"""
+        return isinstance(error, self._AUTH_EXC)
+
+    def _is_api_error(self, error: Exception) -> bool:
+        """Whether the error is a transient API failure worth retrying"""
+        return isinstance(error, self._API_ERROR_EXC)
+
+    async def _retry(self, fn: Callable, *args, **kwargs) -> Any:
+        """Await fn, retrying transient failures with exponential backoff"""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as error:
+                # Rate limits are classified before auth errors: some SDKs'
+                # quota messages also mention the API key
+                if self._is_rate_limit_error(error):
+                    wait_time = 2 ** attempt
+                elif self._is_auth_error(error):
+                    raise ValueError(f"{self._PROVIDER_NAME} API key is invalid: {error}")
+                elif self._is_api_error(error):
+                    wait_time = 1
+                else:
+                    raise ValueError(
+                        f"Error occurred when calling {self._PROVIDER_NAME} API: {error}"
+                    )
+                if attempt == MAX_RETRIES:
+                    raise ValueError(f"{self._PROVIDER_NAME} API error: {error}")
+                await asyncio.sleep(wait_time)
@@ -1,122 +1,116 @@
 """
 Google Gemini provider implementation for Just-Prompt
 """
+import asyncio
 import os
-import time
 from typing import List, Optional, Dict, Any
 
-import google.generativeai as genai
-from google.generativeai.types import GenerateContentResponse
-
+from just_prompt.atoms.llm_providers.base import ChatModelBase
+from just_prompt.atoms.shared.cache import ttl_cache
 from just_prompt.atoms.shared.data_types import PromptResponse
 
+# Default generation parameters, shared by generate and stream_generate
+# (and imported by tests so they track any change made here)
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
 
-class GeminiProvider:
+class GeminiProvider(ChatModelBase):
     """Google Gemini provider implementation"""
-    
-    def __init__(self):
-        """Initialize the Gemini provider with API key"""
+
+    _PROVIDER_NAME = "Google Gemini"
+
+    def __init__(self, model_factory=None):
+        """Initialize the Gemini provider with API key
+
+        The Gemini SDK builds a model object per request rather than one
+        client, so injection happens through a model factory: a callable
+        with the GenerativeModel signature (e.g. a stub in tests). When
+        None, the SDK class is looked up at call time.
+        """
+        # Imported here so the SDK (and its protobuf/grpc dependencies) is
+        # only loaded when this provider is used
+        import google.generativeai as genai
+        from google.api_core import exceptions as gexc
+        self._genai = genai
+        self._RATE_LIMIT_EXC = (gexc.ResourceExhausted,)
+        self._AUTH_EXC = (gexc.PermissionDenied, gexc.Unauthenticated)
+        self.model_factory = model_factory
+
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set")
         genai.configure(api_key=self.api_key)
-    
+
+    def _is_api_error(self, error: Exception) -> bool:
+        # The SDK surfaces transient failures through several exception
+        # families; keep the historical behavior of retrying them all
+        return True
+
+    @ttl_cache()
     async def list_models(self) -> List[str]:
         """List available models from Google Gemini"""
-        try:
-            # Fetch models from Gemini API
-            models = genai.list_models()
-            # Filter to only include text models
-            gemini_models = [
-                model.name.split('/')[-1] 
-                for model in models 
-                if "generateContent" in model.supported_generation_methods
-            ]
-            return gemini_models
-        except Exception as e:
-            return await self._handle_error(e)
-        
+        # Fetch models from Gemini API; the SDK call is synchronous, so
+        # run it in a worker thread to keep the event loop free
+        models = await self._retry(asyncio.to_thread, self._genai.list_models)
+        # Filter to only include text models
+        gemini_models = [
+            model.name.split('/')[-1]
+            for model in models
+            if "generateContent" in model.supported_generation_methods
+        ]
+        return gemini_models
+
     async def generate(self, prompt: str, model: str) -> PromptResponse:
         """Generate a response for the given prompt using the specified model"""
-        try:
-            # Configure the generation model
-            generation_config = {
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-            
-            # Create the model and generate content
-            model_instance = genai.GenerativeModel(
-                model_name=model,
-                generation_config=generation_config
-            )
-            
-            response = model_instance.generate_content(prompt)
-            
-            # Calculate token usage if available
-            tokens = None
-            if hasattr(response, 'usage_metadata'):
-                tokens = response.usage_metadata.total_token_count
-            
-            # Extract text from response
-            content = response.text if hasattr(response, 'text') else self._extract_text_from_response(response)
-            
-            return PromptResponse(
-                model=model,
-                content=content,
-                tokens=tokens
-            )
-        except Exception as e:
-            return await self._handle_error(e, retry_count=0, prompt=prompt, model=model)
-    
-    def _extract_text_from_response(self, response: GenerateContentResponse) -> str:
+        # Create the model and generate content
+        model_factory = self.model_factory or self._genai.GenerativeModel
+        model_instance = model_factory(
+            model_name=model,
+            generation_config=DEFAULT_GENERATION_CONFIG
+        )
+
+        response = await self._retry(model_instance.generate_content_async, prompt)
+
+        # Calculate token usage if available
+        usage = getattr(response, 'usage_metadata', None)
+        tokens = usage.total_token_count if usage else None
+
+        # Extract text from response
+        content = getattr(response, 'text', None)
+        if content is None:
+            content = self._extract_text_from_response(response)
+
+        return PromptResponse(
+            model=model,
+            content=content,
+            tokens=tokens
+        )
+
+    async def stream_generate(self, prompt: str, model: str):
+        """Stream the response for the given prompt as text chunks"""
+        model_factory = self.model_factory or self._genai.GenerativeModel
+        model_instance = model_factory(
+            model_name=model,
+            generation_config=DEFAULT_GENERATION_CONFIG
+        )
+
+        response = await model_instance.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def _extract_text_from_response(self, response: Any) -> str:
         """Extract text from various response formats"""
-        if hasattr(response, 'candidates') and response.candidates:
-            candidate = response.candidates[0]
-            if hasattr(candidate, 'content') and candidate.content:
-                return candidate.content.parts[0].text
-        
+        candidates = getattr(response, 'candidates', None)
+        if candidates:
+            content = getattr(candidates[0], 'content', None)
+            if content:
+                return content.parts[0].text
+
         # Fallback to string representation
         return str(response)
-    
-    async def _handle_error(self, error: Exception, retry_count: int = 0, **kwargs) -> Any:
-        """Handle errors with appropriate retry logic"""
-        # Maximum number of retries
-        max_retries = 3
-        
-        # Handle rate limiting errors
-        if "quota" in str(error).lower() and retry_count < max_retries:
-            # Exponential backoff: wait longer between each retry
-            wait_time = 2 ** retry_count
-            time.sleep(wait_time)
-            
-            # Extract prompt and model from kwargs if they exist
-            prompt = kwargs.get("prompt")
-            model = kwargs.get("model")
-            
-            if prompt and model:
-                # Retry the generate method with incremented retry count
-                retry_count += 1
-                return await self.generate(prompt, model)
-            else:
-                # If we don't have enough information to retry, re-raise the error
-                raise error
-        
-        # Handle authentication errors
-        elif "authentication" in str(error).lower() or "api key" in str(error).lower():
-            raise ValueError(f"Google Gemini API key is invalid: {str(error)}")
-        
-        # Handle API errors
-        elif retry_count < max_retries and kwargs.get("prompt") and kwargs.get("model"):
-            # Wait a bit and retry
-            time.sleep(1)
-            
-            # Retry the generate method with incremented retry count
-            retry_count += 1
-            return await self.generate(kwargs["prompt"], kwargs["model"])
-        
-        # Handle other errors
-        else:
-            raise ValueError(f"Error occurred when calling Google Gemini API: {str(error)}") 
\ No newline at end of file
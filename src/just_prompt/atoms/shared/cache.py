@@ -0,0 +1,38 @@
+"""
+Caching helpers shared across Just-Prompt
+"""
+import functools
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# Default lifetime for cached model lists
+DEFAULT_TTL = 3600.0
+
+
+def ttl_cache(ttl: float = DEFAULT_TTL) -> Callable:
+    """Cache an async callable's result for ttl seconds
+
+    The cache is keyed by the call arguments (including self for methods),
+    so each provider instance caches its own results. Expired entries are
+    refreshed on the next call. Concurrent first calls may fetch in
+    parallel; the last one to finish wins, which is harmless for
+    idempotent lookups like model listings.
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: Dict[Tuple, Tuple[float, Any]] = {}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items()))
+            entry = cache.get(key)
+            now = time.monotonic()
+            if entry is not None and now - entry[0] < ttl:
+                return entry[1]
+            value = await func(*args, **kwargs)
+            cache[key] = (now, value)
+            return value
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
@@ -19,25 +19,28 @@ class Provider(str, Enum):
     @classmethod
     def from_prefix(cls, prefix: str) -> "Provider":
         """Get provider from prefix"""
-        prefix_map = {
-            "o": cls.OPENAI,
-            "openai": cls.OPENAI,
-            "a": cls.ANTHROPIC,
-            "anthropic": cls.ANTHROPIC,
-            "g": cls.GEMINI,
-            "gemini": cls.GEMINI,
-            "q": cls.GROQ,
-            "groq": cls.GROQ,
-            "d": cls.DEEPSEEK,
-            "deepseek": cls.DEEPSEEK,
-            "l": cls.OLLAMA,
-            "ollama": cls.OLLAMA,
-        }
-        
-        if prefix.lower() not in prefix_map:
+        provider = _PREFIX_MAP.get(prefix.lower())
+        if provider is None:
             raise ValueError(f"Unknown provider prefix: {prefix}")
-        
-        return prefix_map[prefix.lower()]
+        return provider
+
+
+# Built once at import (after the enum exists) so from_prefix does a single
+# dict lookup per call instead of rebuilding the map
+_PREFIX_MAP = {
+    "o": Provider.OPENAI,
+    "openai": Provider.OPENAI,
+    "a": Provider.ANTHROPIC,
+    "anthropic": Provider.ANTHROPIC,
+    "g": Provider.GEMINI,
+    "gemini": Provider.GEMINI,
+    "q": Provider.GROQ,
+    "groq": Provider.GROQ,
+    "d": Provider.DEEPSEEK,
+    "deepseek": Provider.DEEPSEEK,
+    "l": Provider.OLLAMA,
+    "ollama": Provider.OLLAMA,
+}
 
 
 class PromptRequest(BaseModel):
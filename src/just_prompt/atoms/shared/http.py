@@ -0,0 +1,32 @@
+"""
+Shared HTTP client used by Just-Prompt providers
+"""
+
+_shared_client = None
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Get (or lazily create) the shared httpx client
+
+    One connection pool with HTTP/2 and raised limits is shared by every
+    provider that speaks HTTP through httpx, so concurrent mixed-provider
+    traffic reuses warm TLS sessions instead of each SDK client paying its
+    own handshakes and file descriptors.
+    """
+    global _shared_client
+    if _shared_client is None:
+        import httpx
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            timeout=120.0,
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+    return _shared_client
+
+
+async def close_async_client():
+    """Close the shared client and drop its connections"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -1,53 +1,210 @@
 """
 Just-Prompt MCP server implementation
 """
+import asyncio
 import json
 import os
 import sys
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from just_prompt.atoms.llm_providers import get_provider_class
+from just_prompt.atoms.shared.data_types import PromptRequest, PromptResponse, Provider
 
-from just_prompt.atoms.shared.data_types import PromptRequest, PromptResponse
+# Provider instances are created on first use and reused so each provider
+# keeps a single SDK client.
+_provider_instances: Dict[Provider, object] = {}
 
-app = FastAPI(title="Just-Prompt", description="MCP server with unified interface for LLM providers")
 
+def _get_provider(provider: Provider):
+    """Get (or lazily create) the provider instance for the given provider"""
+    instance = _provider_instances.get(provider)
+    if instance is None:
+        instance = get_provider_class(provider)()
+        _provider_instances[provider] = instance
+    return instance
 
-@app.get("/")
-async def root():
-    """Root route, returns service information"""
-    return {"status": "ok", "service": "Just-Prompt MCP Server"}
 
+def _parse_model_string(model: str) -> Tuple[Provider, str]:
+    """Parse a "provider:model" string into a (Provider, model name) pair
 
-@app.get("/providers")
-async def list_providers():
-    """List all available providers"""
-    # Provider detection logic will be added here
-    return {"providers": ["To be implemented"]}
+    Example: "a:claude-3-7-sonnet-20250219" -> (Provider.ANTHROPIC, "claude-3-7-sonnet-20250219")
+    """
+    prefix, _, model_name = model.partition(":")
+    if not model_name:
+        raise ValueError(f"Invalid model string: {model}")
+    return Provider.from_prefix(prefix), model_name
 
 
-@app.get("/models")
-async def list_models(provider: Optional[str] = None):
-    """List all available models"""
-    # Model listing logic will be added here
-    return {"models": ["To be implemented"]}
+def _build_app():
+    """Build the FastAPI application
 
+    FastAPI (and its starlette transitive imports) is only loaded here, so
+    importing this module for its data types and helpers stays cheap.
+    """
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import ORJSONResponse, StreamingResponse
 
-@app.post("/prompt", response_model=List[PromptResponse])
-async def prompt(request: PromptRequest):
-    """Process prompt request"""
-    # Prompt processing logic will be added here
-    return [
-        PromptResponse(
-            model="example-model",
-            content="This is an example response. Actual implementation will connect to LLM provider APIs.",
-            tokens=0
+    # orjson serializes response payloads several times faster than the
+    # stdlib json encoder FastAPI uses by default
+    app = FastAPI(
+        title="Just-Prompt",
+        description="MCP server with unified interface for LLM providers",
+        default_response_class=ORJSONResponse
+    )
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        """Close the shared HTTP connection pool"""
+        from just_prompt.atoms.shared.http import close_async_client
+        await close_async_client()
+
+    @app.get("/")
+    async def root():
+        """Root route, returns service information"""
+        return {"status": "ok", "service": "Just-Prompt MCP Server"}
+
+    @app.get("/providers")
+    async def list_providers():
+        """List all available providers"""
+        # Provider detection logic will be added here
+        return {"providers": ["To be implemented"]}
+
+    @app.get("/models")
+    async def list_models(provider: Optional[str] = None):
+        """List available models, optionally restricted to one provider
+
+        With no provider given, every configured provider is queried
+        concurrently, so total latency is one round-trip rather than the
+        sum over providers; unconfigured or failing providers are skipped.
+        """
+        if provider is not None:
+            try:
+                instance = _get_provider(Provider.from_prefix(provider))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return {"models": {provider: await instance.list_models()}}
+
+        instances = []
+        for candidate in Provider:
+            try:
+                instances.append((candidate, _get_provider(candidate)))
+            except ValueError:
+                # Provider not configured (missing API key) or unsupported
+                continue
+
+        lists = await asyncio.gather(
+            *(instance.list_models() for _, instance in instances),
+            return_exceptions=True
         )
-    ]
+        return {
+            "models": {
+                candidate.value: models
+                for (candidate, _), models in zip(instances, lists)
+                if not isinstance(models, Exception)
+            }
+        }
+
+    @app.post("/prompt", response_model=List[PromptResponse])
+    async def prompt(request: PromptRequest):
+        """Process prompt request, fanning out to all requested models concurrently"""
+        if not request.models:
+            raise HTTPException(status_code=400, detail="No models specified")
+
+        try:
+            parsed = [_parse_model_string(model) for model in request.models]
+
+            # When every target model is Anthropic, use the Message Batches
+            # API: one bulk submission at half the per-request cost.
+            if len(parsed) >= 2 and all(provider == Provider.ANTHROPIC for provider, _ in parsed):
+                anthropic_provider = _get_provider(Provider.ANTHROPIC)
+                try:
+                    return await anthropic_provider.batch_generate(
+                        [(request.prompt, model) for _, model in parsed]
+                    )
+                except ValueError as e:
+                    raise HTTPException(status_code=502, detail=str(e))
+
+            tasks = [
+                _get_provider(provider).generate(request.prompt, model)
+                for provider, model in parsed
+            ]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Dispatch every model concurrently; total wall time is the slowest
+        # provider round-trip rather than the sum of all of them.
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        responses = []
+        for (provider, model), result in zip(parsed, results):
+            if isinstance(result, Exception):
+                raise HTTPException(
+                    status_code=502,
+                    detail=f"Error from {provider.value}:{model}: {result}"
+                )
+            responses.append(result)
+        return responses
+
+    @app.post("/prompt/stream")
+    async def prompt_stream(request: PromptRequest):
+        """Stream prompt responses as server-sent events
+
+        Chunks from all requested models are multiplexed into one SSE
+        stream; each data frame carries the model id alongside its text so
+        clients can demultiplex. Time-to-first-token is a single chunk
+        rather than the full completion.
+        """
+        if not request.models:
+            raise HTTPException(status_code=400, detail="No models specified")
+
+        try:
+            parsed = [_parse_model_string(model) for model in request.models]
+            providers = [(_get_provider(provider), model) for provider, model in parsed]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async def event_stream():
+            queue: asyncio.Queue = asyncio.Queue()
+
+            async def pump(provider, model):
+                try:
+                    async for text in provider.stream_generate(request.prompt, model):
+                        await queue.put(("data", model, text))
+                except Exception as e:
+                    await queue.put(("error", model, str(e)))
+                finally:
+                    await queue.put(("done", model, None))
+
+            tasks = [asyncio.create_task(pump(provider, model)) for provider, model in providers]
+            remaining = len(tasks)
+            try:
+                while remaining:
+                    kind, model, text = await queue.get()
+                    if kind == "data":
+                        yield f"data: {json.dumps({'model': model, 'text': text})}\n\n"
+                    elif kind == "error":
+                        yield f"event: error\ndata: {json.dumps({'model': model, 'detail': text})}\n\n"
+                    else:
+                        remaining -= 1
+                        yield f"event: done\ndata: {json.dumps({'model': model})}\n\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
+
+
+def __getattr__(name: str):
+    # Keep `uvicorn just_prompt.server:app` working without paying the
+    # FastAPI import cost when the module is imported for anything else
+    if name == "app":
+        return _build_app()
+    raise AttributeError(name)
 
 
 def start_server(host: str = "127.0.0.1", port: int = 8000):
     """Start the server"""
     import uvicorn
-    uvicorn.run(app, host=host, port=port) 
\ No newline at end of file
+    uvicorn.run(_build_app(), host=host, port=port)
@@ -0,0 +1,92 @@
+"""
+Shared fixtures for the provider tests
+"""
+import os
+import unittest.mock as mock
+from unittest.mock import MagicMock
+
+import pytest
+
+from just_prompt.atoms.llm_providers import base
+from just_prompt.atoms.llm_providers.anthropic import AnthropicProvider
+from just_prompt.atoms.llm_providers.gemini import GeminiProvider
+from just_prompt.atoms.llm_providers.openai import OpenAIProvider
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep(monkeypatch):
+    """Make retry backoff instantaneous and record the requested waits
+
+    The retry loop in ChatModelBase looks up asyncio.sleep through the
+    base module, so patching it there guarantees no real wait can leak
+    into a test even when the test itself forgets to patch sleep. Tests
+    that care about backoff timing can take this fixture explicitly and
+    inspect the recorded durations.
+    """
+    sleeps = []
+
+    async def _instant_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(base.asyncio, "sleep", _instant_sleep)
+    return sleeps
+
+
+@pytest.fixture
+def openai_env(monkeypatch):
+    """Set the OpenAI API key for the duration of a test"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test_key")
+
+
+@pytest.fixture
+def openai_provider(openai_env):
+    """An OpenAIProvider with an injected MagicMock SDK client
+
+    Tests configure the client calls they exercise (e.g.
+    provider.client.chat.completions.create) instead of each repeating
+    the env-var and constructor patches.
+    """
+    return OpenAIProvider(client=MagicMock())
+
+
+@pytest.fixture
+def anthropic_env(monkeypatch):
+    """Set the Anthropic API key for the duration of a test"""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test_key")
+
+
+@pytest.fixture
+def anthropic_provider(anthropic_env):
+    """An AnthropicProvider with an injected MagicMock SDK client"""
+    return AnthropicProvider(client=MagicMock())
+
+
+@pytest.fixture(scope="class")
+def shared_anthropic_provider():
+    """One AnthropicProvider instance reused across a test class
+
+    Only for tests that read from the provider (model parsing, the
+    static model list) without configuring its client; tests that mutate
+    the injected client must use the function-scoped anthropic_provider.
+    Built with mock.patch.dict rather than monkeypatch because the
+    latter is function-scoped.
+    """
+    with mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"}):
+        yield AnthropicProvider(client=MagicMock())
+
+
+@pytest.fixture
+def gemini_env(monkeypatch):
+    """Set the Gemini API key for the duration of a test"""
+    monkeypatch.setenv("GEMINI_API_KEY", "test_key")
+
+
+@pytest.fixture
+def gemini_provider(gemini_env):
+    """A GeminiProvider constructed against a patched genai.configure
+
+    Tests that exercise generation inject their model stub by assigning
+    provider.model_factory rather than patching the SDK class.
+    """
+    with mock.patch("google.generativeai.configure"):
+        yield GeminiProvider()
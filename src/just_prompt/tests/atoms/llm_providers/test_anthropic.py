@@ -8,180 +8,221 @@ import unittest.mock as mock
 from unittest.mock import AsyncMock, MagicMock
 
 import anthropic
+import httpx
 
 from just_prompt.atoms.llm_providers.anthropic import AnthropicProvider
 from just_prompt.atoms.shared.data_types import PromptResponse
 
 
+def _api_error(error_class, message, status_code=400):
+    """Build an SDK error instance with the httpx response it requires"""
+    response = httpx.Response(status_code, request=httpx.Request("POST", "https://api.anthropic.com"))
+    return error_class(message, response=response, body=None)
+
+
 class TestAnthropicProvider:
     """Tests for the Anthropic provider"""
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    def test_init(self):
+    def test_init(self, shared_anthropic_provider):
         """Test initialization"""
-        provider = AnthropicProvider()
-        assert provider.api_key == "test_key"
+        assert shared_anthropic_provider.api_key == "test_key"
 
-    @mock.patch.dict(os.environ, {})
+    @mock.patch.dict(os.environ, {}, clear=True)
     def test_init_missing_key(self):
         """Test initialization with missing API key"""
         with pytest.raises(ValueError, match="ANTHROPIC_API_KEY environment variable not set"):
             AnthropicProvider()
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    async def test_list_models(self):
+    async def test_list_models(self, shared_anthropic_provider):
         """Test listing models"""
-        provider = AnthropicProvider()
-        models = await provider.list_models()
-        
+        models = await shared_anthropic_provider.list_models()
+
         # Check that we got the expected list of models
         assert isinstance(models, list)
         assert "claude-3-opus-20240229" in models
         assert "claude-3-sonnet-20240229" in models
         assert "claude-3-haiku-20240307" in models
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    @mock.patch("anthropic.Anthropic")
-    async def test_generate(self, mock_anthropic):
+    async def test_generate(self, anthropic_provider):
         """Test generating a response"""
-        # Setup mock
-        mock_client = MagicMock()
-        mock_anthropic.return_value = mock_client
-        
         # Create mock response
         mock_content = MagicMock()
         mock_content.text = "Test response"
         mock_response = MagicMock()
         mock_response.content = [mock_content]
-        
+
         # Add usage information if available in the response
         mock_response.usage = MagicMock()
         mock_response.usage.input_tokens = 10
         mock_response.usage.output_tokens = 20
-        
+
         # Setup return value for messages.create()
-        mock_client.messages.create.return_value = mock_response
-        
-        # Initialize provider and call generate
-        provider = AnthropicProvider()
-        response = await provider.generate("Test prompt", "claude-3-sonnet-20240229")
-        
+        anthropic_provider.client.messages.create = AsyncMock(return_value=mock_response)
+
+        response = await anthropic_provider.generate("Test prompt", "claude-3-sonnet-20240229")
+
         # Check that we called messages.create() with the right arguments
-        mock_client.messages.create.assert_called_once_with(
+        anthropic_provider.client.messages.create.assert_called_once_with(
             model="claude-3-sonnet-20240229",
             max_tokens=1024,
             messages=[{"role": "user", "content": "Test prompt"}]
         )
-        
+
         # Check that we got the expected response
         assert isinstance(response, PromptResponse)
         assert response.model == "claude-3-sonnet-20240229"
         assert response.content == "Test response"
         assert response.tokens == 30
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    @mock.patch("anthropic.Anthropic")
-    async def test_generate_with_thinking_tokens(self, mock_anthropic):
+    async def test_generate_with_thinking_tokens(self, anthropic_provider):
         """Test generating a response with thinking tokens specified"""
-        # Setup mock
-        mock_client = MagicMock()
-        mock_anthropic.return_value = mock_client
-        
         # Create mock response
         mock_content = MagicMock()
         mock_content.text = "Test response"
         mock_response = MagicMock()
         mock_response.content = [mock_content]
-        
+
         # Setup return value for messages.create()
-        mock_client.messages.create.return_value = mock_response
-        
-        # Initialize provider and call generate with thinking tokens
-        provider = AnthropicProvider()
-        response = await provider.generate("Test prompt", "claude-3-sonnet-20240229:4k")
-        
+        anthropic_provider.client.messages.create = AsyncMock(return_value=mock_response)
+
+        response = await anthropic_provider.generate("Test prompt", "claude-3-sonnet-20240229:4k")
+
         # Check that we called messages.create() with the right arguments
-        mock_client.messages.create.assert_called_once_with(
+        anthropic_provider.client.messages.create.assert_called_once_with(
             model="claude-3-sonnet-20240229",
             max_tokens=1024,
             messages=[{"role": "user", "content": "Test prompt"}],
             thinking_tokens=4096
         )
-        
+
         # Check that we got the expected response
         assert isinstance(response, PromptResponse)
         assert response.model == "claude-3-sonnet-20240229:4k"
         assert response.content == "Test response"
 
-    def test_parse_model_with_thinking_tokens(self):
+    async def test_stream_generate(self, anthropic_provider):
+        """Test streaming a response as text chunks"""
+        # The SDK stream is an async context manager exposing text_stream
+        async def text_stream():
+            for text in ["Hello", " world"]:
+                yield text
+
+        mock_stream = MagicMock()
+        mock_stream.text_stream = text_stream()
+        mock_context = MagicMock()
+        mock_context.__aenter__ = AsyncMock(return_value=mock_stream)
+        mock_context.__aexit__ = AsyncMock(return_value=False)
+        anthropic_provider.client.messages.stream.return_value = mock_context
+
+        chunks = [
+            chunk async for chunk
+            in anthropic_provider.stream_generate("Test prompt", "claude-3-sonnet-20240229")
+        ]
+
+        # Check that we streamed with the right arguments and got all chunks
+        anthropic_provider.client.messages.stream.assert_called_once_with(
+            model="claude-3-sonnet-20240229",
+            max_tokens=1024,
+            messages=[{"role": "user", "content": "Test prompt"}]
+        )
+        assert chunks == ["Hello", " world"]
+
+    async def test_batch_generate(self, anthropic_provider):
+        """Test generating responses for several prompts via the batches API"""
+        # Batch is already ended when created, so no polling is needed
+        mock_batch = MagicMock()
+        mock_batch.id = "batch_id"
+        mock_batch.processing_status = "ended"
+        anthropic_provider.client.messages.batches.create = AsyncMock(return_value=mock_batch)
+
+        # Build one succeeded result entry per request
+        entries = []
+        for i, text in enumerate(["First response", "Second response"]):
+            message = MagicMock()
+            message.content = [MagicMock(text=text)]
+            message.usage.input_tokens = 10
+            message.usage.output_tokens = i
+            entry = MagicMock()
+            entry.custom_id = f"r{i}"
+            entry.result.type = "succeeded"
+            entry.result.message = message
+            entries.append(entry)
+
+        async def result_iterator():
+            for entry in entries:
+                yield entry
+
+        anthropic_provider.client.messages.batches.results = AsyncMock(return_value=result_iterator())
+
+        responses = await anthropic_provider.batch_generate([
+            ("Test prompt", "claude-3-sonnet-20240229"),
+            ("Test prompt", "claude-3-opus-20240229")
+        ])
+
+        # Check that a single batch was submitted with both requests
+        anthropic_provider.client.messages.batches.create.assert_called_once()
+        requests = anthropic_provider.client.messages.batches.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["r0", "r1"]
+        assert requests[0]["params"]["model"] == "claude-3-sonnet-20240229"
+
+        # Check that responses come back in submission order
+        assert [r.content for r in responses] == ["First response", "Second response"]
+        assert responses[0].tokens == 10
+        assert responses[1].model == "claude-3-opus-20240229"
+
+    def test_parse_model_with_thinking_tokens(self, shared_anthropic_provider):
         """Test parsing model names with thinking tokens suffix"""
-        provider = AnthropicProvider()
-        
+        parse = shared_anthropic_provider._parse_model_with_thinking_tokens
+
         # Test regular model name
-        model, tokens = provider._parse_model_with_thinking_tokens("claude-3-sonnet-20240229")
+        model, tokens = parse("claude-3-sonnet-20240229")
         assert model == "claude-3-sonnet-20240229"
         assert tokens is None
-        
+
         # Test with kilobyte token suffix
-        model, tokens = provider._parse_model_with_thinking_tokens("claude-3-sonnet-20240229:4k")
+        model, tokens = parse("claude-3-sonnet-20240229:4k")
         assert model == "claude-3-sonnet-20240229"
         assert tokens == 4096
-        
+
         # Test with raw number token suffix
-        model, tokens = provider._parse_model_with_thinking_tokens("claude-3-sonnet-20240229:2000")
+        model, tokens = parse("claude-3-sonnet-20240229:2000")
         assert model == "claude-3-sonnet-20240229"
         assert tokens == 2000
-        
+
         # Test with megabyte token suffix
-        model, tokens = provider._parse_model_with_thinking_tokens("claude-3-sonnet-20240229:1m")
+        model, tokens = parse("claude-3-sonnet-20240229:1m")
         assert model == "claude-3-sonnet-20240229"
         assert tokens == 1048576
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    @mock.patch("anthropic.Anthropic")
-    @mock.patch("time.sleep")
-    async def test_handle_rate_limit_error(self, mock_sleep, mock_anthropic):
+    async def test_handle_rate_limit_error(self, anthropic_provider, no_backoff_sleep):
         """Test handling rate limit errors"""
-        # Setup mock
-        mock_client = MagicMock()
-        mock_anthropic.return_value = mock_client
-        
         # First call raises a rate limit error, second call succeeds
         mock_content = MagicMock()
         mock_content.text = "Retry response"
         mock_response = MagicMock()
         mock_response.content = [mock_content]
-        
-        mock_client.messages.create.side_effect = [
-            anthropic.RateLimitError("Rate limit exceeded"),
+
+        anthropic_provider.client.messages.create = AsyncMock(side_effect=[
+            _api_error(anthropic.RateLimitError, "Rate limit exceeded", status_code=429),
             mock_response
-        ]
-        
-        # Initialize provider and call generate
-        provider = AnthropicProvider()
-        response = await provider.generate("Test prompt", "claude-3-sonnet-20240229")
-        
-        # Check that sleep was called
-        mock_sleep.assert_called_once_with(1)  # First retry = 2^0 = 1 second
-        
+        ])
+
+        response = await anthropic_provider.generate("Test prompt", "claude-3-sonnet-20240229")
+
+        # Check the backoff: first retry = 2^0 = 1 second
+        assert no_backoff_sleep == [1]
+
         # Check that we got the expected response after retry
         assert response.model == "claude-3-sonnet-20240229"
         assert response.content == "Retry response"
 
-    @mock.patch.dict(os.environ, {"ANTHROPIC_API_KEY": "test_key"})
-    @mock.patch("anthropic.Anthropic")
-    async def test_handle_authentication_error(self, mock_anthropic):
+    async def test_handle_authentication_error(self, anthropic_provider):
         """Test handling authentication errors"""
-        # Setup mock
-        mock_client = MagicMock()
-        mock_anthropic.return_value = mock_client
-        
         # Raise an authentication error
-        mock_client.messages.create.side_effect = anthropic.AuthenticationError("Invalid API key")
-        
-        # Initialize provider and call generate
-        provider = AnthropicProvider()
-        
+        anthropic_provider.client.messages.create = AsyncMock(
+            side_effect=_api_error(anthropic.AuthenticationError, "Invalid API key", status_code=401)
+        )
+
         # Check that we raise the expected error
         with pytest.raises(ValueError, match="Anthropic API key is invalid"):
-            await provider.generate("Test prompt", "claude-3-sonnet-20240229") 
\ No newline at end of file
+            await anthropic_provider.generate("Test prompt", "claude-3-sonnet-20240229")
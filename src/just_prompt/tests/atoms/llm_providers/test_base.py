@@ -0,0 +1,41 @@
+"""
+Tests for the shared provider retry loop
+"""
+import pytest
+
+from just_prompt.atoms.llm_providers.base import MAX_RETRIES, ChatModelBase
+
+
+class _FlakyError(Exception):
+    pass
+
+
+class _FlakyProvider(ChatModelBase):
+    """Minimal subclass whose only failure mode is rate limiting"""
+    _PROVIDER_NAME = "Flaky"
+    _RATE_LIMIT_EXC = (_FlakyError,)
+
+
+class TestChatModelBase:
+    """Tests for ChatModelBase._retry"""
+
+    async def test_backoff_sequence_on_exhausted_retries(self, no_backoff_sleep):
+        """Test the full backoff sequence when every attempt is rate limited
+
+        Runs against the recorded virtual clock, so exercising all
+        MAX_RETRIES waits costs no wall time.
+        """
+        provider = _FlakyProvider()
+        attempts = 0
+
+        async def always_rate_limited():
+            nonlocal attempts
+            attempts += 1
+            raise _FlakyError("rate limited")
+
+        with pytest.raises(ValueError, match="Flaky API error: rate limited"):
+            await provider._retry(always_rate_limited)
+
+        # Exponential backoff: 2^0, 2^1, 2^2 before giving up
+        assert no_backoff_sleep == [1, 2, 4]
+        assert attempts == MAX_RETRIES + 1